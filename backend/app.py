@@ -1,13 +1,20 @@
 from __future__ import annotations
 
-import json
+import gzip
+import hashlib
+import io
 import os
 import time
-from typing import Any
+from importlib.util import find_spec
+from typing import IO, Any
 
+import orjson
 import pandas as pd
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, redirect, request
+from flask import Flask, Request, Response, jsonify, make_response, redirect, request
+from flask.json.provider import JSONProvider
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
 from werkzeug.exceptions import HTTPException
 
 from backend.mailer import (
@@ -24,6 +31,7 @@ from backend.mailer import (
     send_all_mails_oauth,
     send_test_mail,
     send_test_mail_oauth,
+    template_columns,
     to_text,
 )
 from backend.oauth_service import (
@@ -40,6 +48,62 @@ from backend.store import store
 
 load_dotenv()
 
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+# Cell texts pd.read_excel reads as missing: pandas' default NA strings plus the
+# formula error values (#DIV/0!, #REF!, ...) that data_only mode returns as text.
+EXCEL_NA_STRINGS = frozenset(
+    {
+        "",
+        "#N/A",
+        "#N/A N/A",
+        "#NA",
+        "-1.#IND",
+        "-1.#QNAN",
+        "-NaN",
+        "-nan",
+        "1.#IND",
+        "1.#QNAN",
+        "<NA>",
+        "N/A",
+        "NA",
+        "NULL",
+        "NaN",
+        "None",
+        "n/a",
+        "nan",
+        "null",
+        *ERROR_CODES,
+    }
+)
+AUTH_MODES = frozenset({"password", "oauth", "mailapp"})
+OAUTH_PROVIDERS = frozenset({"microsoft", "google"})
+MAIL_APP_PROVIDERS = frozenset({"outlook", "gmail", "custom"})
+
+_OAUTH_POPUP_HTML = b"""<!doctype html>
+<html>
+  <head>
+    <meta charset=\"utf-8\" />
+    <title>PostPanda OAuth</title>
+    <style>
+      body { font-family: Arial, sans-serif; padding: 20px; color: #1f2937; }
+      .hint { color: #6b7280; font-size: 14px; }
+    </style>
+  </head>
+  <body>
+    <h3>OAuth completed</h3>
+    <p class=\"hint\">This window can now be closed.</p>
+    <script>
+      const payload = %(payload)s;
+      const targetOrigin = %(origin)s;
+      if (window.opener) {
+        window.opener.postMessage(payload, targetOrigin);
+      }
+      setTimeout(() => window.close(), 120);
+    </script>
+  </body>
+</html>
+"""
+
 
 class ApiError(Exception):
     def __init__(self, message: str, status_code: int = 400):
@@ -48,8 +112,39 @@ class ApiError(Exception):
         self.status_code = status_code
 
 
+class InMemoryUploadRequest(Request):
+    def _get_file_stream(
+        self,
+        total_content_length: int | None,
+        content_type: str | None,
+        filename: str | None = None,
+        content_length: int | None = None,
+    ) -> IO[bytes]:
+        # Uploads are capped by MAX_CONTENT_LENGTH, so keep them in RAM instead of
+        # letting Werkzeug spool anything above 500KB to a temporary file.
+        return io.BytesIO()
+
+
+class OrjsonProvider(JSONProvider):
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+            mimetype="application/json",
+        )
+
+
 def create_app() -> Flask:
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    app.request_class = InMemoryUploadRequest
+    app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
 
     @app.get("/")
     def root() -> Any:
@@ -99,6 +194,12 @@ def create_app() -> Flask:
     @app.get("/api/oauth/status")
     def oauth_status() -> Any:
         client_id = str(request.args.get("clientId", "")).strip()
+        etag = hashlib.blake2b(f"{client_id}:{oauth_store.revision}".encode(), digest_size=8).hexdigest()
+        if request.if_none_match.contains(etag):
+            not_modified = make_response("", 304)
+            not_modified.set_etag(etag)
+            return not_modified
+
         catalog = provider_catalog()
         accounts = oauth_store.list_accounts(client_id) if client_id else {}
 
@@ -113,7 +214,10 @@ def create_app() -> Flask:
                 "expiresAt": account.expires_at if account else None,
             }
 
-        return jsonify({"providers": providers})
+        response = jsonify({"providers": providers})
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     @app.get("/api/oauth/login/<provider>")
     def oauth_login(provider: str) -> Any:
@@ -243,13 +347,10 @@ def create_app() -> Flask:
             raise ApiError("Please select an Excel file.")
 
         try:
-            dataframe = pd.read_excel(file)
+            dataframe = _excel_to_dataframe(file.stream, file.filename)
         except Exception as exc:
             raise ApiError(f"Failed to read Excel file: {exc}") from exc
 
-        dataframe.columns = [str(col).strip() for col in dataframe.columns]
-        dataframe = dataframe.dropna(how="all")
-
         if dataframe.empty:
             raise ApiError("The Excel file contains no recipient rows.")
 
@@ -273,7 +374,8 @@ def create_app() -> Flask:
         index = _normalize_index(payload.get("index", 0), len(dataframe))
         template = str(payload.get("template", ""))
 
-        row = dataframe.iloc[index].to_dict()
+        columns = template_columns(template, dataframe.columns, mapping["email_col"], mapping["variable_map"])
+        row = _require_row(payload, index, columns)
         preview = render_template(
             row=row,
             template=template,
@@ -302,18 +404,19 @@ def create_app() -> Flask:
         auth_mode = _extract_auth_mode(payload)
 
         index = _normalize_index(payload.get("index", 0), len(dataframe))
+        row = _require_row(payload, index)
 
         if auth_mode == "oauth":
             config = _extract_oauth_mail_config(payload)
-            send_test_mail_oauth(dataframe, index, config)
+            send_test_mail_oauth(row, config)
             message = f"Test email to {config.sender} was sent."
         elif auth_mode == "mailapp":
             config = _extract_mail_app_config(payload)
-            recipient = create_test_draft_mail_app(dataframe, index, config)
+            recipient = create_test_draft_mail_app(row, config)
             message = f"Message for {recipient} was opened in the default mail app."
         else:
             config = _extract_mail_config(payload)
-            send_test_mail(dataframe, index, config)
+            send_test_mail(row, config)
             message = f"Test email to {config.sender} was sent."
 
         return jsonify({"ok": True, "mode": auth_mode, "message": message})
@@ -326,7 +429,7 @@ def create_app() -> Flask:
 
         if auth_mode == "oauth":
             config = _extract_oauth_mail_config(payload)
-            result = send_all_mails_oauth(dataframe, config)
+            result = send_all_mails_oauth(dataframe, config, parallelism=_oauth_parallelism())
             return jsonify({"ok": True, "mode": "oauth", **result})
 
         if auth_mode == "mailapp":
@@ -344,24 +447,98 @@ def create_app() -> Flask:
             )
 
         config = _extract_mail_config(payload)
-        result = send_all_mails(dataframe, config)
+        result = send_all_mails(dataframe, config, parallelism=_smtp_parallelism())
         return jsonify({"ok": True, "mode": "password", **result})
 
     return app
 
 
-def _require_json(payload: dict[str, Any] | None) -> dict[str, Any]:
-    if payload is None:
+def _excel_to_dataframe(source: IO[bytes], filename: str) -> pd.DataFrame:
+    if _fast_excel_io():
+        return _clean_dataframe(pd.read_excel(source, engine="calamine"))
+
+    # Legacy .xls workbooks are not readable by openpyxl.
+    if filename.lower().endswith(".xls"):
+        return _clean_dataframe(pd.read_excel(source))
+
+    workbook = load_workbook(filename=source, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        # Read-only sheets trust the stored dimensions, which some writers get wrong.
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, ())
+        # NA strings become None like in pd.read_excel, and blank rows are dropped while
+        # streaming instead of with a dropna pass afterwards.
+        records = []
+        for row in rows:
+            row = tuple(None if type(value) is str and value in EXCEL_NA_STRINGS else value for value in row)
+            if any(value is not None for value in row):
+                records.append(row)
+    finally:
+        workbook.close()
+
+    width = max((_row_width(row) for row in [header, *records]), default=0)
+    columns = _unique_column_names([header[i] if i < len(header) else None for i in range(width)])
+    padding = (None,) * width
+    records = [(row + padding)[:width] for row in records]
+
+    if not records:
+        return pd.DataFrame(columns=columns)
+    return pd.DataFrame(dict(zip(columns, (list(values) for values in zip(*records)))))
+
+
+def _clean_dataframe(dataframe: pd.DataFrame) -> pd.DataFrame:
+    dataframe.columns = [str(col).strip() for col in dataframe.columns]
+    return dataframe.dropna(how="all")
+
+
+def _row_width(row: tuple[Any, ...]) -> int:
+    width = len(row)
+    while width and row[width - 1] is None:
+        width -= 1
+    return width
+
+
+def _unique_column_names(names: list[Any]) -> list[str]:
+    # Same naming as pd.read_excel: "Unnamed: 3" for blank headers, "Name.1" for repeats.
+    columns: list[str] = []
+    seen: dict[str, int] = {}
+    for position, name in enumerate(names):
+        column = ("" if name is None else str(name).strip()) or f"Unnamed: {position}"
+        count = seen.get(column, 0)
+        seen[column] = count + 1
+        while count and f"{column}.{count}" in seen:
+            count += 1
+        if count:
+            column = f"{column}.{count}"
+            seen[column] = 1
+        columns.append(column)
+    return columns
+
+
+def _require_json(payload: Any) -> dict[str, Any]:
+    if not isinstance(payload, dict):
         raise ApiError("Invalid JSON body.")
     return payload
 
 
-def _require_dataframe(payload: dict[str, Any]) -> pd.DataFrame:
+def _extract_object(payload: dict[str, Any], key: str, label: str | None = None) -> dict[str, Any]:
+    value = payload.get(key) or {}
+    if not isinstance(value, dict):
+        raise ApiError(f"{label or key} must be an object.")
+    return value
+
+
+def _require_session_id(payload: dict[str, Any]) -> str:
     session_id = str(payload.get("sessionId", "")).strip()
     if not session_id:
         raise ApiError("sessionId is required.")
+    return session_id
+
 
-    dataframe = store.get(session_id)
+def _require_dataframe(payload: dict[str, Any]) -> pd.DataFrame:
+    dataframe = store.get(_require_session_id(payload))
     if dataframe is None:
         raise ApiError("Session not found. Please upload the Excel file again.", 404)
     if dataframe.empty:
@@ -369,6 +546,13 @@ def _require_dataframe(payload: dict[str, Any]) -> pd.DataFrame:
     return dataframe
 
 
+def _require_row(payload: dict[str, Any], index: int, columns: list[str] | None = None) -> dict[str, Any]:
+    row = store.get_row(_require_session_id(payload), index, columns)
+    if row is None:
+        raise ApiError("Session not found. Please upload the Excel file again.", 404)
+    return row
+
+
 def _normalize_index(value: Any, total: int) -> int:
     if total <= 0:
         return 0
@@ -381,17 +565,14 @@ def _normalize_index(value: Any, total: int) -> int:
 
 def _extract_auth_mode(payload: dict[str, Any]) -> str:
     mode = str(payload.get("authMode", "password")).strip().lower()
-    if mode not in ("password", "oauth", "mailapp"):
+    if mode not in AUTH_MODES:
         raise ApiError("authMode must be 'password', 'oauth', or 'mailapp'.")
     return mode
 
 
 def _extract_mapping(payload: dict[str, Any]) -> dict[str, Any]:
-    mapping = payload.get("mapping") or {}
-    raw_variable_map = mapping.get("variableMap") or {}
-
-    if not isinstance(raw_variable_map, dict):
-        raise ApiError("mapping.variableMap must be an object.")
+    mapping = _extract_object(payload, "mapping")
+    raw_variable_map = _extract_object(mapping, "variableMap", "mapping.variableMap")
 
     variable_map: dict[str, str] = {}
     for variable_name, column_name in raw_variable_map.items():
@@ -435,7 +616,7 @@ def _extract_message_fields(payload: dict[str, Any]) -> tuple[dict[str, Any], st
 
 def _extract_mail_config(payload: dict[str, Any]) -> MailConfig:
     mapping, subject, template = _extract_message_fields(payload)
-    smtp = payload.get("smtp") or {}
+    smtp = _extract_object(payload, "smtp")
 
     sender = str(smtp.get("sender", "")).strip()
     password = str(smtp.get("password", "")).strip()
@@ -469,9 +650,9 @@ def _extract_mail_config(payload: dict[str, Any]) -> MailConfig:
 
 def _extract_mail_app_config(payload: dict[str, Any]) -> MailAppDraftConfig:
     mapping, subject, template = _extract_message_fields(payload)
-    mail_app = payload.get("mailApp") or {}
+    mail_app = _extract_object(payload, "mailApp")
     provider = str(mail_app.get("provider", "")).strip().lower()
-    if provider not in ("outlook", "gmail", "custom"):
+    if provider not in MAIL_APP_PROVIDERS:
         provider = "custom"
     return MailAppDraftConfig(
         provider=provider,
@@ -484,7 +665,7 @@ def _extract_mail_app_config(payload: dict[str, Any]) -> MailAppDraftConfig:
 
 def _extract_oauth_mail_config(payload: dict[str, Any]) -> OAuthMailConfig:
     mapping, subject, template = _extract_message_fields(payload)
-    oauth = payload.get("oauth") or {}
+    oauth = _extract_object(payload, "oauth")
 
     provider = _normalize_oauth_provider(str(oauth.get("provider", "")))
     client_id = str(oauth.get("clientId", "")).strip()
@@ -529,7 +710,7 @@ def _refresh_oauth_account_if_needed(account: OAuthAccount) -> OAuthAccount:
 
 def _normalize_oauth_provider(provider: str) -> str:
     normalized = provider.strip().lower()
-    if normalized not in ("microsoft", "google"):
+    if normalized not in OAUTH_PROVIDERS:
         raise ApiError("OAuth provider must be 'microsoft' or 'google'.")
     return normalized
 
@@ -543,6 +724,28 @@ def _oauth_callback_uri(provider: str) -> str:
     return f"{_oauth_callback_base()}/api/oauth/callback/{provider}"
 
 
+def _fast_excel_io() -> bool:
+    # Opt-in Rust-based calamine reader; only used when python-calamine is installed and
+    # pandas is new enough (2.2+) to offer the engine, otherwise openpyxl is used.
+    enabled = os.getenv("POSTPANDA_FAST_IO", "").strip() == "1"
+    pandas_version = tuple(int(part) for part in pd.__version__.split(".")[:2])
+    return enabled and pandas_version >= (2, 2) and find_spec("python_calamine") is not None
+
+
+def _smtp_parallelism() -> int:
+    try:
+        return max(1, int(os.getenv("POSTPANDA_SMTP_PARALLELISM", "4")))
+    except ValueError:
+        return 4
+
+
+def _oauth_parallelism() -> int:
+    try:
+        return max(1, int(os.getenv("POSTPANDA_OAUTH_PARALLELISM", "4")))
+    except ValueError:
+        return 4
+
+
 def _default_frontend_origin() -> str:
     origin = os.getenv("POSTPANDA_FRONTEND_ORIGIN")
     return (origin or "http://127.0.0.1:5173").rstrip("/")
@@ -552,33 +755,15 @@ def _oauth_popup_response(frontend_origin: str, payload: dict[str, Any], status_
     safe_origin = frontend_origin if frontend_origin.startswith(("http://", "https://")) else _default_frontend_origin()
     post_message_payload = {"type": "postpanda-oauth", **payload}
 
-    html = f"""<!doctype html>
-<html>
-  <head>
-    <meta charset=\"utf-8\" />
-    <title>PostPanda OAuth</title>
-    <style>
-      body {{ font-family: Arial, sans-serif; padding: 20px; color: #1f2937; }}
-      .hint {{ color: #6b7280; font-size: 14px; }}
-    </style>
-  </head>
-  <body>
-    <h3>OAuth completed</h3>
-    <p class=\"hint\">This window can now be closed.</p>
-    <script>
-      const payload = {json.dumps(post_message_payload)};
-      const targetOrigin = {json.dumps(safe_origin)};
-      if (window.opener) {{
-        window.opener.postMessage(payload, targetOrigin);
-      }}
-      setTimeout(() => window.close(), 120);
-    </script>
-  </body>
-</html>
-"""
-    response = make_response(html, status_code)
-    response.headers["Content-Type"] = "text/html; charset=utf-8"
-    return response
+    html = _OAUTH_POPUP_HTML % {
+        b"payload": orjson.dumps(post_message_payload),
+        b"origin": orjson.dumps(safe_origin),
+    }
+    headers = {"Content-Type": "text/html; charset=utf-8", "Vary": "Accept-Encoding"}
+    if request.accept_encodings["gzip"]:
+        html = gzip.compress(html, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return make_response(html, status_code, headers)
 
 
 app = create_app()
@@ -1,30 +1,149 @@
 from __future__ import annotations
 
+import atexit
 import base64
 import html
 import re
 import smtplib
 import ssl
+import string
 import subprocess
 import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Queue
+from threading import Event, Lock
 from urllib.parse import quote
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import repeat
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Any
+from email.policy import Policy, compat32
+from typing import Any, Iterable
 
+import numpy as np
+import orjson
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 BOLD_REGEX = re.compile(r"\*\*(.+?)\*\*")
 LINK_REGEX = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
+PLACEHOLDER_REGEX = re.compile(r"{{\s*([^{}]+?)\s*}}")
+NON_ALNUM_REGEX = re.compile(r"[^a-z0-9]+")
+MARKUP_CHARS_REGEX = re.compile(r"[*\[\]()\n]")
+
+# Stands in for placeholders when the template literals are rendered to HTML up front.
+_HTML_SLOT = "\x00"
+
+# Deletes every ASCII character except a-z and 0-9 (applied after lower()).
+_NORMALIZE_TABLE = dict.fromkeys(code for code in range(128) if chr(code) not in string.ascii_lowercase + string.digits)
+
+# str.translate tables equivalent to urllib.parse.quote for ASCII input, per safe set.
+_MAILTO_ADDRESS_SAFE = "@._-+"
+_PERCENT_ENCODE_TABLES = {
+    safe: {
+        code: f"%{code:02X}"
+        for code in range(128)
+        if chr(code) not in string.ascii_letters + string.digits + "_.-~" + safe
+    }
+    for safe in ("", _MAILTO_ADDRESS_SAFE)
+}
+
+# Messages are serialized with CRLF line endings, so smtplib sends the bytes without
+# re-encoding a str or rewriting line endings.
+SMTP_POLICY = compat32.clone(linesep="\r\n")
+# Distinct message bodies whose serialized bytes are kept during one send call.
+SERIALIZED_BODY_CACHE_SIZE = 32
+
+# Transient SMTP replies (service unavailable, mailbox busy, temporary TLS/auth failure).
+SMTP_RETRY_CODES = frozenset({421, 450, 454})
+SMTP_MAX_RETRIES = 3
+SMTP_RETRY_DELAY_SECONDS = 1.0
+
+# Outlook throttling allows 4 concurrent requests per mailbox; more only earns 429s.
+GRAPH_MAX_CONCURRENCY = 4
+
+# Graph sendMail body; subject, HTML content and recipient are spliced in as JSON strings.
+_GRAPH_SEND_MAIL_PAYLOAD = (
+    b'{"message":{"subject":%s,"body":{"contentType":"HTML","content":%s},'
+    b'"toRecipients":[{"emailAddress":{"address":%s}}]},"saveToSentItems":"true"}'
+)
+
+# Pooled keep-alive session for Graph/Gmail sends. Only throttling replies are retried,
+# since the API rejected those requests before sending anything.
+_HTTP = requests.Session()
+_HTTP.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            read=0,
+            backoff_factor=0.5,
+            status_forcelist=(429, 503),
+            allowed_methods=frozenset({"POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        ),
+    ),
+)
+atexit.register(_HTTP.close)
 
 
 class MailerError(Exception):
     pass
 
 
+@dataclass(frozen=True)
+class CompiledTemplate:
+    # literals[i] precedes placeholder i; the last literal follows the final placeholder.
+    literals: tuple[str, ...]
+    tokens: tuple[str, ...]
+    placeholders: tuple[str, ...]
+    # The literals already rendered to HTML, or None when markup depends on placeholder values.
+    html_literals: tuple[str, ...] | None
+
+
+# A placeholder is filled from row[key], or with the fallback text when key is None.
+ValueSource = tuple[Any, str]
+
+
+@dataclass(frozen=True)
+class BoundTemplate:
+    literals: tuple[str, ...]
+    sources: tuple[ValueSource, ...]
+    html_literals: tuple[str, ...] | None = None
+
+    def render(self, row: dict[str, Any]) -> str:
+        if not self.sources:
+            return self.literals[0]
+        parts = [self.literals[0]]
+        for (key, fallback), literal in zip(self.sources, self.literals[1:]):
+            parts.append(fallback if key is None else to_text(row.get(key, "")))
+            parts.append(literal)
+        return "".join(parts)
+
+    def render_html(self, row: dict[str, Any]) -> str | None:
+        # Same as render_html_from_markup(self.render(row)), or None when a value could
+        # change the markup around it and the full render is needed.
+        if self.html_literals is None:
+            return None
+        parts = [self.html_literals[0]]
+        for (key, fallback), literal in zip(self.sources, self.html_literals[1:]):
+            value = fallback if key is None else to_text(row.get(key, ""))
+            if not value or MARKUP_CHARS_REGEX.search(value):
+                return None
+            parts.append(html.escape(value))
+            parts.append(literal)
+        return "".join(parts)
+
+
 @dataclass
 class MailConfig:
     sender: str
@@ -35,6 +154,10 @@ class MailConfig:
     template: str
     email_col: str
     variable_map: dict[str, str]
+    compiled_template: CompiledTemplate = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.compiled_template = compile_template(self.template)
 
 
 @dataclass
@@ -46,6 +169,10 @@ class OAuthMailConfig:
     template: str
     email_col: str
     variable_map: dict[str, str]
+    compiled_template: CompiledTemplate = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.compiled_template = compile_template(self.template)
 
 
 @dataclass
@@ -55,11 +182,24 @@ class MailAppDraftConfig:
     template: str
     email_col: str
     variable_map: dict[str, str]
+    compiled_template: CompiledTemplate = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.compiled_template = compile_template(self.template)
 
 
 def to_text(value: Any) -> str:
     if value is None:
         return ""
+    # Fast paths for the common cell types, skipping the pd.isna() dispatch.
+    kind = type(value)
+    if kind is str:
+        text = value.strip()
+        return "" if text.lower() == "nan" else text
+    if kind is float:
+        return "" if value != value else str(value)
+    if kind is int:
+        return str(value)
     try:
         if pd.isna(value):
             return ""
@@ -70,7 +210,24 @@ def to_text(value: Any) -> str:
 
 
 def is_valid_email(value: str) -> bool:
-    return bool(EMAIL_REGEX.match((value or "").strip()))
+    # Callers pass already stripped text (to_text() or stripped form input).
+    return bool(EMAIL_REGEX.match(value or ""))
+
+
+def _prepare_recipients(dataframe: pd.DataFrame, email_col: str) -> tuple[np.ndarray, np.ndarray]:
+    # One pass over the email column instead of to_text() + is_valid_email() per row.
+    # Returns the valid-row mask and the stripped address for every row.
+    if email_col not in dataframe.columns:
+        return np.zeros(len(dataframe), dtype=bool), np.full(len(dataframe), "", dtype=object)
+    values = dataframe[email_col]
+    if isinstance(values, pd.DataFrame):
+        values = values.iloc[:, -1]
+    # to_text() gives every cell the same text as the scalar path, so columns without
+    # strings (e.g. numeric IDs) simply come out invalid. Matching on an object column
+    # keeps Python's re, like is_valid_email (pyarrow-backed strings would use RE2).
+    cleaned = values.astype(object).map(to_text).astype(object)
+    valid = cleaned.str.match(EMAIL_REGEX).to_numpy(dtype=bool)
+    return valid, cleaned.to_numpy(dtype=object)
 
 
 def _safe_link(url: str) -> str | None:
@@ -80,79 +237,147 @@ def _safe_link(url: str) -> str | None:
     return None
 
 
-def render_html_from_markup(text: str) -> str:
-    escaped = html.escape(text or "")
-
-    def bold_replace(match: re.Match[str]) -> str:
-        return f"<strong>{match.group(1)}</strong>"
+def _link_html(match: re.Match[str]) -> str:
+    label = match.group(1).strip()
+    raw_url = html.unescape(match.group(2).strip())
+    safe_url = _safe_link(raw_url)
+    if not safe_url:
+        return match.group(0)
+    href = html.escape(safe_url, quote=True)
+    return f'<a href="{href}" target="_blank" rel="noopener noreferrer">{label}</a>'
 
-    def link_replace(match: re.Match[str]) -> str:
-        label = match.group(1).strip()
-        raw_url = html.unescape(match.group(2).strip())
-        safe_url = _safe_link(raw_url)
-        if not safe_url:
-            return match.group(0)
-        href = html.escape(safe_url, quote=True)
-        return f'<a href="{href}" target="_blank" rel="noopener noreferrer">{label}</a>'
 
-    rendered = BOLD_REGEX.sub(bold_replace, escaped)
-    rendered = LINK_REGEX.sub(link_replace, rendered)
-    rendered = rendered.replace("\n", "<br>\n")
-    return rendered
+def render_html_from_markup(text: str) -> str:
+    # Passes whose marker does not occur are skipped; each one rewrites the whole body.
+    rendered = html.escape(text or "")
+    if "**" in rendered:
+        rendered = BOLD_REGEX.sub(r"<strong>\1</strong>", rendered)
+    if "](" in rendered:
+        rendered = LINK_REGEX.sub(_link_html, rendered)
+    return rendered.replace("\n", "<br>\n")
 
 
 def render_plain_text_from_markup(text: str) -> str:
     plain = text or ""
-    plain = LINK_REGEX.sub(lambda m: f"{m.group(1)} ({m.group(2)})", plain)
-    plain = BOLD_REGEX.sub(lambda m: m.group(1), plain)
+    if "](" in plain:
+        plain = LINK_REGEX.sub(r"\1 (\2)", plain)
+    if "**" in plain:
+        plain = BOLD_REGEX.sub(r"\1", plain)
     return plain
 
 
-def render_template(
-    row: dict[str, Any],
-    template: str,
+def render_plain_bodies(markup: pd.Series) -> pd.Series:
+    # Column-wise equivalent of render_plain_text_from_markup.
+    plain = markup.astype(object)
+    if plain.str.contains("](", regex=False).any():
+        plain = plain.str.replace(LINK_REGEX, r"\1 (\2)", regex=True)
+    # Checked after the link pass, which can join two single asterisks.
+    if plain.str.contains("**", regex=False).any():
+        plain = plain.str.replace(BOLD_REGEX, r"\1", regex=True)
+    return plain
+
+
+def render_html_bodies(markup: pd.Series) -> pd.Series:
+    # Column-wise equivalent of render_html_from_markup.
+    rendered_html = markup.astype(object).map(html.escape)
+    if rendered_html.str.contains("**", regex=False).any():
+        rendered_html = rendered_html.str.replace(BOLD_REGEX, r"<strong>\1</strong>", regex=True)
+    if rendered_html.str.contains("](", regex=False).any():
+        rendered_html = rendered_html.str.replace(LINK_REGEX, _link_html, regex=True)
+    if rendered_html.str.contains("\n", regex=False).any():
+        rendered_html = rendered_html.str.replace("\n", "<br>\n", regex=False)
+    return rendered_html
+
+
+def _render_html_literals(literals: tuple[str, ...]) -> tuple[str, ...] | None:
+    # Renders the template with a marker in each placeholder slot and splits the HTML there.
+    # A non-empty value without markup characters cannot change which bold/link spans match,
+    # so it can be escaped into the slot later. Links whose URL holds a placeholder are
+    # excluded because the URL is checked and escaped as a whole.
+    if any(_HTML_SLOT in literal for literal in literals):
+        return None
+    markup = _HTML_SLOT.join(literals)
+    escaped = html.escape(markup)
+    if "**" in escaped:
+        escaped = BOLD_REGEX.sub(r"<strong>\1</strong>", escaped)
+    if any(_HTML_SLOT in match.group(2) for match in LINK_REGEX.finditer(escaped)):
+        return None
+    html_literals = tuple(render_html_from_markup(markup).split(_HTML_SLOT))
+    return html_literals if len(html_literals) == len(literals) else None
+
+
+def normalize_key(value: str) -> str:
+    lowered = value.lower()
+    if lowered.isascii():
+        return lowered.translate(_NORMALIZE_TABLE)
+    return NON_ALNUM_REGEX.sub("", lowered)
+
+
+@lru_cache(maxsize=64)
+def compile_template(template: str) -> CompiledTemplate:
+    template = template or ""
+    literals: list[str] = []
+    tokens: list[str] = []
+    placeholders: list[str] = []
+    position = 0
+    for match in PLACEHOLDER_REGEX.finditer(template):
+        literals.append(template[position : match.start()])
+        tokens.append(match.group(1).strip())
+        placeholders.append(match.group(0))
+        position = match.end()
+    literals.append(template[position:])
+    return CompiledTemplate(
+        literals=tuple(literals),
+        tokens=tuple(tokens),
+        placeholders=tuple(placeholders),
+        html_literals=_render_html_literals(tuple(literals)),
+    )
+
+
+def bind_template(
+    compiled: CompiledTemplate,
+    columns: Iterable[Any],
     email_col: str,
     variable_map: dict[str, str] | None = None,
-) -> str:
-    body = template or ""
-    email = to_text(row.get(email_col, "")) if email_col else ""
-    replacements: dict[str, str] = {}
-    normalized_replacements: dict[str, str] = {}
+) -> BoundTemplate:
+    # Which placeholder maps to which value only depends on the column names, not on the
+    # row values, so the lookup is resolved once per sheet instead of once per row.
+    if not compiled.tokens:
+        return BoundTemplate(literals=compiled.literals, sources=(), html_literals=compiled.html_literals)
 
-    def normalize_key(value: str) -> str:
-        return re.sub(r"[^a-z0-9]+", "", value.lower())
+    replacements: dict[str, ValueSource] = {}
+    normalized_replacements: dict[str, ValueSource] = {}
 
-    def register_replacement(key: str, value: str) -> None:
+    def register_replacement(key: str, source: ValueSource) -> None:
         if not key:
             return
-        replacements[key] = value
+        replacements[key] = source
         normalized = normalize_key(key)
         if normalized and normalized not in normalized_replacements:
-            normalized_replacements[normalized] = value
+            normalized_replacements[normalized] = source
 
     # Direct Excel column placeholders: {{ColumnName}}
-    for key, value in row.items():
-        column_key = str(key).strip()
+    for column in columns:
+        column_key = str(column).strip()
         if column_key:
-            register_replacement(column_key, to_text(value))
+            register_replacement(column_key, (column, ""))
 
     # Variable mapping placeholders: {{Variable}}
     if variable_map:
         for variable_name, column_name in variable_map.items():
             placeholder = str(variable_name).strip()
-            column = str(column_name).strip()
             if not placeholder:
                 continue
-            register_replacement(placeholder, to_text(row.get(column, "")))
+            register_replacement(placeholder, (str(column_name).strip(), ""))
 
     # Fixed email placeholders
-    register_replacement("Mail", email)
-    register_replacement("Email", email)
+    email_source: ValueSource = (email_col, "") if email_col else (None, "")
+    register_replacement("Mail", email_source)
+    register_replacement("Email", email_source)
 
-    lower_replacements = {key.lower(): value for key, value in replacements.items()}
+    lower_replacements = {key.lower(): source for key, source in replacements.items()}
 
-    def replace_match(match: re.Match[str]) -> str:
-        token = match.group(1).strip()
+    def resolve(token: str, placeholder: str) -> ValueSource:
         if token in replacements:
             return replacements[token]
         lower_token = token.lower()
@@ -161,49 +386,98 @@ def render_template(
         normalized_token = normalize_key(token)
         if normalized_token in normalized_replacements:
             return normalized_replacements[normalized_token]
-        return match.group(0)
+        return (None, placeholder)
 
-    return re.sub(r"{{\s*([^{}]+?)\s*}}", replace_match, body)
+    sources = tuple(resolve(token, placeholder) for token, placeholder in zip(compiled.tokens, compiled.placeholders))
+    return BoundTemplate(literals=compiled.literals, sources=sources, html_literals=compiled.html_literals)
 
 
-def build_message(config: MailConfig, row: dict[str, Any], recipient: str) -> MIMEMultipart:
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = config.subject
-    msg["From"] = config.sender
-    msg["To"] = recipient
+def render_template(
+    row: dict[str, Any],
+    template: str,
+    email_col: str,
+    variable_map: dict[str, str] | None = None,
+) -> str:
+    return render_compiled(compile_template(template), row, email_col, variable_map)
 
-    body = render_template(
-        row=row,
-        template=config.template,
-        email_col=config.email_col,
-        variable_map=config.variable_map,
-    )
-    body_plain = render_plain_text_from_markup(body)
-    body_html = render_html_from_markup(body)
-    msg.attach(MIMEText(body_plain, "plain", "utf-8"))
-    msg.attach(MIMEText(body_html, "html", "utf-8"))
-    return msg
+
+def render_compiled(
+    compiled: CompiledTemplate,
+    row: dict[str, Any],
+    email_col: str,
+    variable_map: dict[str, str] | None = None,
+) -> str:
+    if not compiled.tokens:
+        return compiled.literals[0]
+    return bind_template(compiled, row.keys(), email_col, variable_map).render(row)
 
 
-def build_oauth_message(config: OAuthMailConfig, row: dict[str, Any], recipient: str) -> MIMEMultipart:
+def template_columns(
+    template: str,
+    columns: Iterable[Any],
+    email_col: str,
+    variable_map: dict[str, str] | None = None,
+) -> list[str]:
+    # Rendering a row restricted to these columns gives the same text as the full row;
+    # the email column is always included so the recipient can be read from the row.
+    bound = bind_template(compile_template(template), columns, email_col, variable_map)
+    used = [str(key) for key, _ in bound.sources if key is not None]
+    if email_col:
+        used.append(email_col)
+    return list(dict.fromkeys(used))
+
+
+def build_message(
+    config: MailConfig | OAuthMailConfig,
+    recipient: str,
+    body_plain: str,
+    body_html: str,
+) -> MIMEMultipart:
     msg = MIMEMultipart("alternative")
     msg["Subject"] = config.subject
     msg["From"] = config.sender
-    msg["To"] = recipient
-
-    body = render_template(
-        row=row,
-        template=config.template,
-        email_col=config.email_col,
-        variable_map=config.variable_map,
-    )
-    body_plain = render_plain_text_from_markup(body)
-    body_html = render_html_from_markup(body)
+    if recipient:
+        msg["To"] = recipient
     msg.attach(MIMEText(body_plain, "plain", "utf-8"))
     msg.attach(MIMEText(body_html, "html", "utf-8"))
     return msg
 
 
+# Serializes the messages of one send call. The bytes of a body without the To header are
+# kept for the most recent bodies, so recipients sharing a body only get their To line
+# prepended; the bound keeps fully personalized sends from holding every message.
+class MessageSerializer:
+    def __init__(
+        self,
+        config: MailConfig | OAuthMailConfig,
+        policy: Policy = compat32,
+        max_cached: int = SERIALIZED_BODY_CACHE_SIZE,
+    ) -> None:
+        self._config = config
+        self._policy = policy
+        self._linesep = policy.linesep.encode("ascii")
+        self._max_cached = max_cached
+        self._serialized_bodies: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._lock = Lock()
+
+    def serialize(self, recipient: str, body_plain: str, body_html: str) -> bytes:
+        if not recipient.isascii():
+            return build_message(self._config, recipient, body_plain, body_html).as_bytes(policy=self._policy)
+
+        key = (body_plain, body_html)
+        with self._lock:
+            serialized = self._serialized_bodies.get(key)
+            if serialized is not None:
+                self._serialized_bodies.move_to_end(key)
+        if serialized is None:
+            serialized = build_message(self._config, "", body_plain, body_html).as_bytes(policy=self._policy)
+            with self._lock:
+                self._serialized_bodies[key] = serialized
+                if len(self._serialized_bodies) > self._max_cached:
+                    self._serialized_bodies.popitem(last=False)
+        return b"To: " + recipient.encode("ascii") + self._linesep + serialized
+
+
 def connect_smtp(config: MailConfig) -> smtplib.SMTP:
     context = ssl.create_default_context()
     server = smtplib.SMTP(config.host, config.port, timeout=30)
@@ -214,92 +488,213 @@ def connect_smtp(config: MailConfig) -> smtplib.SMTP:
     return server
 
 
-def send_test_mail(dataframe: pd.DataFrame, index: int, config: MailConfig) -> None:
-    if dataframe.empty:
-        raise MailerError("The recipient list is empty.")
+# A fixed set of logged-in SMTP sessions that drain a shared job queue in parallel.
+class SMTPPool:
+    def __init__(self, config: MailConfig, size: int) -> None:
+        self._config = config
+        self._servers: list[smtplib.SMTP] = []
+        self._messages = MessageSerializer(config, SMTP_POLICY)
+        self._servers.append(connect_smtp(config))
+        try:
+            for _ in range(size - 1):
+                self._servers.append(connect_smtp(config))
+        except (smtplib.SMTPException, OSError):
+            # Some providers limit parallel logins; send over the sessions that did connect.
+            pass
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> SMTPPool:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def send_all(self, jobs: list[tuple[str, str, str]]) -> int:
+        queue: Queue[tuple[str, str, str]] = Queue()
+        for job in jobs:
+            queue.put(job)
+
+        stop = Event()
+        with ThreadPoolExecutor(max_workers=len(self._servers)) as executor:
+            futures = [executor.submit(self._work, slot, queue, stop) for slot in range(len(self._servers))]
+            return sum(future.result() for future in futures)
+
+    def close(self) -> None:
+        for server in self._servers:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                server.close()
+        self._servers = []
+
+    def _work(self, slot: int, queue: Queue[tuple[str, str, str]], stop: Event) -> int:
+        sent = 0
+        try:
+            while not stop.is_set():
+                try:
+                    recipient, body_plain, body_html = queue.get_nowait()
+                except Empty:
+                    break
+                self._send(slot, recipient, self._messages.serialize(recipient, body_plain, body_html))
+                sent += 1
+        except BaseException:
+            # Stop the other workers; the first error is reported to the caller.
+            stop.set()
+            raise
+        return sent
+
+    def _send(self, slot: int, recipient: str, message_bytes: bytes) -> None:
+        for attempt in range(SMTP_MAX_RETRIES + 1):
+            try:
+                self._servers[slot].sendmail(self._config.sender, recipient, message_bytes)
+                return
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as exc:
+                code = _smtp_error_code(exc)
+                if code not in SMTP_RETRY_CODES or attempt == SMTP_MAX_RETRIES:
+                    raise
+            time.sleep(SMTP_RETRY_DELAY_SECONDS * 2**attempt)
+            if code == 421:
+                # 421 means the server is closing this session; open a new one.
+                self._servers[slot].close()
+                self._servers[slot] = connect_smtp(self._config)
+
+
+def _smtp_error_code(exc: smtplib.SMTPException) -> int | None:
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in exc.recipients.values()]
+        return codes[0] if codes else None
+    return getattr(exc, "smtp_code", None)
+
+
+def _render_row_bodies(dataframe: pd.DataFrame, bound: BoundTemplate) -> tuple[np.ndarray, np.ndarray]:
+    if not bound.sources:
+        # Without placeholders every row gets the same body.
+        body = bound.literals[0]
+        return (
+            np.full(len(dataframe), render_plain_text_from_markup(body), dtype=object),
+            np.full(len(dataframe), render_html_from_markup(body), dtype=object),
+        )
 
-    row_dict = dataframe.iloc[index % len(dataframe)].to_dict()
-    message = build_message(config, row_dict, config.sender)
+    # Fill the template once per distinct combination of used values, convert that markup
+    # column-wise (HTML only where the pre-rendered literals cannot be used), then spread
+    # the bodies back over the rows.
+    # Rows are read from one object array per used column, like the full row dict would
+    # (the last of duplicate column names wins).
+    positions = {column: position for position, column in enumerate(dataframe.columns)}
+    keys = list(dict.fromkeys(key for key, _ in bound.sources if key is not None and key in positions))
+    # Keyed by the rendered text, so values like 1 and True do not share a body.
+    texts = [
+        [to_text(value) for value in dataframe.iloc[:, positions[key]].to_numpy(dtype=object)]
+        for key in keys
+    ]
+    rows = zip(*texts) if texts else repeat((), len(dataframe))
+
+    slots: dict[tuple[str, ...], int] = {}
+    row_slots = np.fromiter(
+        (slots.setdefault(values, len(slots)) for values in rows),
+        dtype=np.intp,
+        count=len(dataframe),
+    )
+    slot_rows = [dict(zip(keys, values)) for values in slots]
+    markup = pd.Series([bound.render(row) for row in slot_rows], dtype=object)
+    bodies_plain = render_plain_bodies(markup).to_numpy(dtype=object)
+
+    bodies_html = np.empty(len(slot_rows), dtype=object)
+    bodies_html[:] = [bound.render_html(row) for row in slot_rows]
+    missing = [slot for slot, body in enumerate(bodies_html) if body is None]
+    if missing:
+        bodies_html[missing] = render_html_bodies(markup.iloc[missing]).to_numpy(dtype=object)
+    return bodies_plain[row_slots], bodies_html[row_slots]
+
+
+def send_test_mail(row_dict: dict[str, Any], config: MailConfig) -> None:
+    body = render_compiled(config.compiled_template, row_dict, config.email_col, config.variable_map)
+    message = build_message(
+        config,
+        config.sender,
+        render_plain_text_from_markup(body),
+        render_html_from_markup(body),
+    )
 
     server = None
     try:
         server = connect_smtp(config)
-        server.sendmail(config.sender, config.sender, message.as_string())
+        server.sendmail(config.sender, config.sender, message.as_bytes(policy=SMTP_POLICY))
     finally:
         if server is not None:
             server.quit()
 
 
-def send_all_mails(dataframe: pd.DataFrame, config: MailConfig) -> dict[str, int]:
+def send_all_mails(dataframe: pd.DataFrame, config: MailConfig, parallelism: int = 1) -> dict[str, int]:
     if dataframe.empty:
         raise MailerError("The recipient list is empty.")
 
-    sent = 0
-    skipped = 0
+    valid_rows, recipients = _prepare_recipients(dataframe, config.email_col)
+    skipped = int((~valid_rows).sum())
     total = len(dataframe)
 
-    server = None
-    try:
-        server = connect_smtp(config)
-        for _, row in dataframe.iterrows():
-            row_dict = row.to_dict()
-            recipient = to_text(row_dict.get(config.email_col, ""))
-            if not is_valid_email(recipient):
-                skipped += 1
-                continue
-            message = build_message(config, row_dict, recipient)
-            server.sendmail(config.sender, recipient, message.as_string())
-            sent += 1
-    finally:
-        if server is not None:
-            server.quit()
+    bound = bind_template(config.compiled_template, dataframe.columns, config.email_col, config.variable_map)
+    bodies_plain, bodies_html = _render_row_bodies(dataframe[valid_rows], bound)
+    jobs = list(zip(recipients[valid_rows], bodies_plain, bodies_html))
 
-    return {"total": total, "sent": sent, "skipped": skipped}
+    sent = 0
+    if jobs:
+        with SMTPPool(config, min(max(1, parallelism), len(jobs))) as pool:
+            sent = pool.send_all(jobs)
 
+    return {"total": total, "sent": sent, "skipped": skipped}
 
-def send_test_mail_oauth(dataframe: pd.DataFrame, index: int, config: OAuthMailConfig) -> None:
-    if dataframe.empty:
-        raise MailerError("The recipient list is empty.")
 
-    row_dict = dataframe.iloc[index % len(dataframe)].to_dict()
-    _send_oauth_message(config, row_dict, config.sender)
+def send_test_mail_oauth(row_dict: dict[str, Any], config: OAuthMailConfig) -> None:
+    body = render_compiled(config.compiled_template, row_dict, config.email_col, config.variable_map)
+    _send_oauth_message(config, config.sender, render_plain_text_from_markup(body), render_html_from_markup(body))
 
 
-def send_all_mails_oauth(dataframe: pd.DataFrame, config: OAuthMailConfig) -> dict[str, int]:
+def send_all_mails_oauth(dataframe: pd.DataFrame, config: OAuthMailConfig, parallelism: int = 1) -> dict[str, int]:
     if dataframe.empty:
         raise MailerError("The recipient list is empty.")
 
-    sent = 0
-    skipped = 0
+    valid_rows, recipients = _prepare_recipients(dataframe, config.email_col)
+    skipped = int((~valid_rows).sum())
     total = len(dataframe)
 
-    for _, row in dataframe.iterrows():
-        row_dict = row.to_dict()
-        recipient = to_text(row_dict.get(config.email_col, ""))
-        if not is_valid_email(recipient):
-            skipped += 1
-            continue
-        _send_oauth_message(config, row_dict, recipient)
-        sent += 1
+    bound = bind_template(config.compiled_template, dataframe.columns, config.email_col, config.variable_map)
+    bodies_plain, bodies_html = _render_row_bodies(dataframe[valid_rows], bound)
+    jobs = list(zip(recipients[valid_rows], bodies_plain, bodies_html))
 
-    return {"total": total, "sent": sent, "skipped": skipped}
+    messages = MessageSerializer(config)
+    stop = Event()
 
+    def send(job: tuple[str, str, str]) -> bool:
+        if stop.is_set():
+            return False
+        try:
+            _send_oauth_message(config, *job, messages=messages)
+        except BaseException:
+            stop.set()
+            raise
+        return True
 
-def create_test_draft_mail_app(dataframe: pd.DataFrame, index: int, config: MailAppDraftConfig) -> str:
-    if dataframe.empty:
-        raise MailerError("The recipient list is empty.")
+    workers = min(max(1, parallelism), len(jobs))
+    if config.provider.strip().lower() == "microsoft":
+        workers = min(workers, GRAPH_MAX_CONCURRENCY)
+
+    sent = 0
+    if jobs:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            sent = sum(executor.map(send, jobs))
+
+    return {"total": total, "sent": sent, "skipped": skipped}
 
-    row_dict = dataframe.iloc[index % len(dataframe)].to_dict()
+
+def create_test_draft_mail_app(row_dict: dict[str, Any], config: MailAppDraftConfig) -> str:
     recipient = to_text(row_dict.get(config.email_col, ""))
     if not is_valid_email(recipient):
         raise MailerError("Recipient for test draft is invalid.")
 
-    body_markup = render_template(
-        row=row_dict,
-        template=config.template,
-        email_col=config.email_col,
-        variable_map=config.variable_map,
-    )
+    body_markup = render_compiled(config.compiled_template, row_dict, config.email_col, config.variable_map)
     body_html = render_html_from_markup(body_markup)
     body_plain = render_plain_text_from_markup(body_markup)
     _create_mail_program_draft(config.provider, config.subject, recipient, body_plain, body_html)
@@ -310,72 +705,47 @@ def create_all_drafts_mail_app(dataframe: pd.DataFrame, config: MailAppDraftConf
     if dataframe.empty:
         raise MailerError("The recipient list is empty.")
 
+    valid_rows, recipients = _prepare_recipients(dataframe, config.email_col)
     total = len(dataframe)
     drafted = 0
-    skipped = 0
-
-    for _, row in dataframe.iterrows():
-        row_dict = row.to_dict()
-        recipient = to_text(row_dict.get(config.email_col, ""))
-        if not is_valid_email(recipient):
-            skipped += 1
-            continue
-
-        body_markup = render_template(
-            row=row_dict,
-            template=config.template,
-            email_col=config.email_col,
-            variable_map=config.variable_map,
-        )
-        body_html = render_html_from_markup(body_markup)
-        body_plain = render_plain_text_from_markup(body_markup)
+    skipped = int((~valid_rows).sum())
+
+    bound = bind_template(config.compiled_template, dataframe.columns, config.email_col, config.variable_map)
+    bodies_plain, bodies_html = _render_row_bodies(dataframe[valid_rows], bound)
+    for recipient, body_plain, body_html in zip(recipients[valid_rows], bodies_plain, bodies_html):
         _create_mail_program_draft(config.provider, config.subject, recipient, body_plain, body_html)
         drafted += 1
 
     return {"total": total, "drafted": drafted, "skipped": skipped}
 
 
-def _send_oauth_message(config: OAuthMailConfig, row: dict[str, Any], recipient: str) -> None:
+def _send_oauth_message(
+    config: OAuthMailConfig,
+    recipient: str,
+    body_plain: str,
+    body_html: str,
+    messages: MessageSerializer | None = None,
+) -> None:
     provider = config.provider.strip().lower()
     if provider == "microsoft":
-        _send_with_microsoft_graph(config, row, recipient)
+        _send_with_microsoft_graph(config, recipient, body_html)
         return
     if provider == "google":
-        _send_with_gmail_api(config, row, recipient)
+        _send_with_gmail_api(config, recipient, body_plain, body_html, messages or MessageSerializer(config))
         return
     raise MailerError("Unknown OAuth provider for sending.")
 
 
-def _send_with_microsoft_graph(config: OAuthMailConfig, row: dict[str, Any], recipient: str) -> None:
-    body_markup = render_template(
-        row=row,
-        template=config.template,
-        email_col=config.email_col,
-        variable_map=config.variable_map,
+def _send_with_microsoft_graph(config: OAuthMailConfig, recipient: str, body_html: str) -> None:
+    payload = _GRAPH_SEND_MAIL_PAYLOAD % (
+        orjson.dumps(config.subject),
+        orjson.dumps(body_html),
+        orjson.dumps(recipient),
     )
-    body_html = render_html_from_markup(body_markup)
 
-    payload = {
-        "message": {
-            "subject": config.subject,
-            "body": {
-                "contentType": "HTML",
-                "content": body_html,
-            },
-            "toRecipients": [
-                {
-                    "emailAddress": {
-                        "address": recipient,
-                    }
-                }
-            ],
-        },
-        "saveToSentItems": "true",
-    }
-
-    response = requests.post(
+    response = _HTTP.post(
         "https://graph.microsoft.com/v1.0/me/sendMail",
-        json=payload,
+        data=payload,
         headers={
             "Authorization": f"Bearer {config.access_token}",
             "Content-Type": "application/json",
@@ -388,12 +758,17 @@ def _send_with_microsoft_graph(config: OAuthMailConfig, row: dict[str, Any], rec
         raise MailerError(f"Microsoft Graph sendMail failed: {detail}")
 
 
-def _send_with_gmail_api(config: OAuthMailConfig, row: dict[str, Any], recipient: str) -> None:
-    message = build_oauth_message(config, row, recipient)
-    raw_bytes = message.as_bytes()
-    raw_base64 = base64.urlsafe_b64encode(raw_bytes).decode("ascii").rstrip("=")
+def _send_with_gmail_api(
+    config: OAuthMailConfig,
+    recipient: str,
+    body_plain: str,
+    body_html: str,
+    messages: MessageSerializer,
+) -> None:
+    raw_bytes = messages.serialize(recipient, body_plain, body_html)
+    raw_base64 = base64.urlsafe_b64encode(raw_bytes).rstrip(b"=").decode("ascii")
 
-    response = requests.post(
+    response = _HTTP.post(
         "https://gmail.googleapis.com/gmail/v1/users/me/messages/send",
         json={"raw": raw_base64},
         headers={"Authorization": f"Bearer {config.access_token}"},
@@ -407,7 +782,7 @@ def _send_with_gmail_api(config: OAuthMailConfig, row: dict[str, Any], recipient
 
 def _response_detail(response: requests.Response) -> str:
     try:
-        data = response.json()
+        data = orjson.loads(response.content)
         if isinstance(data, dict):
             if "error" in data and isinstance(data["error"], dict):
                 msg = str(data["error"].get("message", "")).strip()
@@ -457,12 +832,19 @@ def _open_in_default_mail_app(subject: str, recipient: str, body: str) -> None:
 
 
 def _build_mailto_url(recipient: str, subject: str, body: str) -> str:
-    to_part = quote(recipient, safe="@._-+")
-    subject_part = quote(subject or "", safe="")
-    body_part = quote(body or "", safe="")
+    to_part = _percent_encode(recipient, _MAILTO_ADDRESS_SAFE)
+    subject_part = _percent_encode(subject or "", "")
+    body_part = _percent_encode(body or "", "")
     return f"mailto:{to_part}?subject={subject_part}&body={body_part}"
 
 
+def _percent_encode(value: str, safe: str) -> str:
+    # Same output as quote(value, safe=safe); ASCII text is encoded by one str.translate.
+    if value.isascii():
+        return value.translate(_PERCENT_ENCODE_TABLES[safe])
+    return quote(value, safe=safe)
+
+
 def _create_outlook_draft(subject: str, recipient: str, html_content: str) -> None:
     if sys.platform != "darwin":
         raise MailerError("Outlook drafts via AppleScript are only available on macOS.")
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
+import atexit
 import os
 import time
+from functools import lru_cache
 from urllib.parse import urlencode
 
+import orjson
 import requests
 
 
+# Shared session so token and profile requests reuse pooled TLS connections.
+_HTTP = requests.Session()
+atexit.register(_HTTP.close)
+
+
 class OAuthError(Exception):
     pass
 
 
+# OAuth credentials come from the environment, which does not change while the process runs.
+@lru_cache(maxsize=1)
 def provider_catalog() -> dict[str, dict[str, str | bool]]:
     microsoft_ready = bool(os.getenv("MS_CLIENT_ID") and os.getenv("MS_CLIENT_SECRET"))
     google_ready = bool(os.getenv("GOOGLE_CLIENT_ID") and os.getenv("GOOGLE_CLIENT_SECRET"))
@@ -135,7 +145,7 @@ def fetch_user_email(provider: str, access_token: str) -> str:
     provider = validate_provider(provider)
 
     if provider == "microsoft":
-        response = requests.get(
+        response = _HTTP.get(
             "https://graph.microsoft.com/v1.0/me?$select=mail,userPrincipalName",
             headers={"Authorization": f"Bearer {access_token}"},
             timeout=20,
@@ -143,7 +153,7 @@ def fetch_user_email(provider: str, access_token: str) -> str:
         data = _read_json_response(response)
         email = (data.get("mail") or data.get("userPrincipalName") or "").strip()
     else:
-        response = requests.get(
+        response = _HTTP.get(
             "https://www.googleapis.com/oauth2/v2/userinfo",
             headers={"Authorization": f"Bearer {access_token}"},
             params={"alt": "json"},
@@ -179,14 +189,14 @@ def _normalize_token_response(data: dict[str, object]) -> dict[str, str | float
 
 
 def _post_form(url: str, payload: dict[str, str]) -> dict[str, object]:
-    response = requests.post(url, data=payload, timeout=20)
+    response = _HTTP.post(url, data=payload, timeout=20)
     return _read_json_response(response)
 
 
 def _read_json_response(response: requests.Response) -> dict[str, object]:
     data: dict[str, object]
     try:
-        data = response.json()
+        data = orjson.loads(response.content)
     except Exception as exc:
         raise OAuthError(f"OAuth-Provider antwortet nicht mit JSON (HTTP {response.status_code}).") from exc
 
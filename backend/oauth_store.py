@@ -5,6 +5,11 @@ import time
 from dataclasses import dataclass
 from threading import Lock
 
+PENDING_STATE_MAX_AGE_SECONDS = 900
+# Expired pending states are swept after this many creates or this many seconds, whichever comes first.
+PENDING_STATE_SWEEP_EVERY = 64
+PENDING_STATE_SWEEP_INTERVAL_SECONDS = 60
+
 
 @dataclass
 class OAuthAccount:
@@ -29,56 +34,78 @@ class PendingOAuthState:
 
 class OAuthStore:
     def __init__(self) -> None:
+        # Replaced wholesale under the lock and never mutated, so readers skip the lock.
         self._accounts: dict[tuple[str, str], OAuthAccount] = {}
         self._pending_states: dict[str, PendingOAuthState] = {}
+        self._creates_since_sweep = 0
+        self._last_sweep_at = time.time()
         self._lock = Lock()
+        # Changes whenever an account is stored or removed; the prefix keeps values unique across restarts.
+        self._instance = secrets.token_hex(4)
+        self._version = 0
+
+    @property
+    def revision(self) -> str:
+        return f"{self._instance}-{self._version}"
 
     def set_account(self, client_id: str, account: OAuthAccount) -> None:
         key = (client_id, account.provider)
         with self._lock:
-            self._accounts[key] = account
+            self._accounts = {**self._accounts, key: account}
+            self._version += 1
 
     def get_account(self, client_id: str, provider: str) -> OAuthAccount | None:
-        key = (client_id, provider)
-        with self._lock:
-            return self._accounts.get(key)
+        return self._accounts.get((client_id, provider))
 
     def remove_account(self, client_id: str, provider: str) -> None:
         key = (client_id, provider)
         with self._lock:
-            self._accounts.pop(key, None)
+            if key in self._accounts:
+                self._accounts = {saved_key: account for saved_key, account in self._accounts.items() if saved_key != key}
+                self._version += 1
 
     def list_accounts(self, client_id: str) -> dict[str, OAuthAccount]:
-        with self._lock:
-            return {
-                provider: account
-                for (saved_client_id, provider), account in self._accounts.items()
-                if saved_client_id == client_id
-            }
+        return {
+            provider: account
+            for (saved_client_id, provider), account in self._accounts.items()
+            if saved_client_id == client_id
+        }
 
     def create_pending_state(self, provider: str, client_id: str, frontend_origin: str) -> str:
-        self._cleanup_pending_states(max_age_seconds=900)
+        now = time.time()
         state = secrets.token_urlsafe(32)
         pending = PendingOAuthState(
             provider=provider,
             client_id=client_id,
             frontend_origin=frontend_origin,
-            created_at=time.time(),
+            created_at=now,
         )
         with self._lock:
             self._pending_states[state] = pending
+            self._creates_since_sweep += 1
+            if (
+                self._creates_since_sweep >= PENDING_STATE_SWEEP_EVERY
+                or now - self._last_sweep_at >= PENDING_STATE_SWEEP_INTERVAL_SECONDS
+            ):
+                self._cleanup_pending_states(now)
         return state
 
     def consume_pending_state(self, state: str) -> PendingOAuthState | None:
         with self._lock:
-            return self._pending_states.pop(state, None)
-
-    def _cleanup_pending_states(self, max_age_seconds: int) -> None:
-        cutoff = time.time() - max_age_seconds
-        with self._lock:
-            expired = [key for key, value in self._pending_states.items() if value.created_at < cutoff]
-            for key in expired:
-                self._pending_states.pop(key, None)
+            pending = self._pending_states.pop(state, None)
+        # Sweeps are periodic now, so an expired state may still be stored.
+        if pending is None or pending.created_at < time.time() - PENDING_STATE_MAX_AGE_SECONDS:
+            return None
+        return pending
+
+    def _cleanup_pending_states(self, now: float) -> None:
+        # Caller holds self._lock.
+        cutoff = now - PENDING_STATE_MAX_AGE_SECONDS
+        expired = [key for key, value in self._pending_states.items() if value.created_at < cutoff]
+        for key in expired:
+            self._pending_states.pop(key, None)
+        self._creates_since_sweep = 0
+        self._last_sweep_at = now
 
 
 oauth_store = OAuthStore()
@@ -1,25 +1,69 @@
 from __future__ import annotations
 
+import time
+from dataclasses import dataclass
 from threading import Lock
+from typing import Any, Collection
 from uuid import uuid4
 
 import pandas as pd
 
+SESSION_TTL_SECONDS = 3600
+
+
+@dataclass
+class StoredSheet:
+    dataframe: pd.DataFrame
+    columns: list[str]
+    last_used: float
+
 
 class SessionStore:
-    def __init__(self) -> None:
-        self._items: dict[str, pd.DataFrame] = {}
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS) -> None:
+        # Replaced wholesale under the lock and never mutated, so readers skip the lock.
+        self._items: dict[str, StoredSheet] = {}
+        self._ttl_seconds = ttl_seconds
         self._lock = Lock()
 
     def create(self, dataframe: pd.DataFrame) -> str:
         session_id = uuid4().hex
+        now = time.time()
+        sheet = StoredSheet(
+            dataframe=dataframe,
+            columns=[str(column) for column in dataframe.columns],
+            last_used=now,
+        )
         with self._lock:
-            self._items[session_id] = dataframe
+            cutoff = now - self._ttl_seconds
+            items = {key: stored for key, stored in self._items.items() if stored.last_used >= cutoff}
+            items[session_id] = sheet
+            self._items = items
         return session_id
 
     def get(self, session_id: str) -> pd.DataFrame | None:
-        with self._lock:
-            return self._items.get(session_id)
+        sheet = self._touch(session_id)
+        return sheet.dataframe if sheet else None
+
+    def get_row(self, session_id: str, index: int, columns: Collection[str] | None = None) -> dict[str, Any] | None:
+        sheet = self._touch(session_id)
+        if sheet is None:
+            return None
+        # Reads single cells instead of building a Series over every column.
+        dataframe = sheet.dataframe
+        wanted = None if columns is None else set(columns)
+        return {
+            column: dataframe.iat[index, position]
+            for position, column in enumerate(sheet.columns)
+            if wanted is None or column in wanted
+        }
+
+    def _touch(self, session_id: str) -> StoredSheet | None:
+        now = time.time()
+        sheet = self._items.get(session_id)
+        if sheet is None or sheet.last_used < now - self._ttl_seconds:
+            return None
+        sheet.last_used = now
+        return sheet
 
 
 store = SessionStore()